@@ -0,0 +1,6 @@
+# Cron entrypoint: runs the polling loop as its own process so the web
+# service never shares a GIL with JSON parsing or bet processing.
+from worker import worker
+
+if __name__ == '__main__':
+    worker()
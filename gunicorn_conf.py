@@ -0,0 +1,9 @@
+import os
+
+# gthread workers keep the health endpoints responsive under concurrent
+# checks; start with: gunicorn -c gunicorn_conf.py web:app
+# The cron loop runs as its own process (cron.py), not in these workers.
+bind = f"0.0.0.0:{os.environ.get('PORT', '10000')}"
+workers = 2
+worker_class = 'gthread'
+threads = 8
@@ -0,0 +1,46 @@
+# cython: language_level=3
+# Compiled fast path for the per-advantage processing loop.
+#
+# Build in place with:  cythonize -i processor.pyx
+# worker.py falls back to its pure-Python implementation when this
+# extension has not been built, so the build step is optional.
+
+cpdef dict process_advantage_data(dict advantage):
+    """Process individual advantage data (compiled variant)"""
+    cdef dict market = advantage['market']
+    cdef dict event = market['event']
+    cdef dict o0, participant
+
+    outcomes = advantage.get('outcomes') or ()
+    o0 = outcomes[0] if outcomes else {}
+    participant = o0.get('participant') or {}
+    market_statistics = advantage.get('marketStatistics') or ({},)
+
+    implied_probability = market_statistics[0].get('value')
+    outcome_payout = o0.get('payout')
+
+    profit_potential = None
+    EV = None
+
+    if implied_probability is not None and outcome_payout is not None:
+        profit_potential = (outcome_payout - 1) * 100
+        implied_probability_decimal = implied_probability / 100
+        EV = (implied_probability_decimal * profit_potential) - ((1 - implied_probability_decimal) * 100)
+
+    return {
+        'key': advantage['key'],
+        'edge': advantage['type'],
+        'lastFoundAt': advantage['lastFoundAt'],
+        'type': market['type'],
+        'market_name': event['name'],
+        'participants': [p['name'] for p in event['participants']],
+        'outcome_payout': outcome_payout,
+        'source': o0.get('source'),
+        'participant': participant.get('name'),
+        'sport': participant.get('sport'),
+        'implied_probability': implied_probability,
+        'profit_potential': profit_potential,
+        'EV': EV,
+        'event_start_time': event.get('startTime'),
+        'competition_instance_name': (event.get('competitionInstance') or {}).get('name')
+    }
@@ -0,0 +1,64 @@
+import os
+from datetime import datetime, timezone
+import orjson
+from flask import Flask, jsonify
+from flask.json.provider import JSONProvider
+
+from worker import get_collection
+
+class OrjsonProvider(JSONProvider):
+    """orjson-backed serialization for jsonify responses"""
+
+    def dumps(self, obj, **kwargs):
+        # default=str covers the datetime values in the status payloads
+        return orjson.dumps(obj, default=str).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+# Lightweight web service: just the health endpoints, reading from Mongo.
+# The polling loop runs as its own process (see cron.py), so /status
+# latency is independent of where the cron job is in its cycle.
+app = Flask(__name__)
+app.json = OrjsonProvider(app)
+
+@app.route('/')
+def health_check():
+    """Health check endpoint"""
+    return jsonify({
+        'status': 'healthy',
+        'timestamp': datetime.now(timezone.utc).isoformat()
+    })
+
+@app.route('/status')
+def worker_status():
+    """Worker status endpoint"""
+    try:
+        collection = get_collection()
+        # Projection + hint make this a covered query answered entirely
+        # from the updated_at index
+        last_update = collection.find_one(
+            {},
+            {'_id': 0, 'updated_at': 1},
+            sort=[('updated_at', -1)],
+            hint=[('updated_at', -1)]
+        )
+
+        return jsonify({
+            'status': 'healthy',
+            'database_connected': True,
+            'last_update': last_update['updated_at'] if last_update else None,
+            'timestamp': datetime.now(timezone.utc).isoformat()
+        })
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'database_connected': False,
+            'error': str(e),
+            'timestamp': datetime.now(timezone.utc).isoformat()
+        }), 500
+
+if __name__ == '__main__':
+    # Dev entrypoint; production runs gunicorn -c gunicorn_conf.py web:app
+    port = int(os.environ.get('PORT', 10000))
+    app.run(host='0.0.0.0', port=port)
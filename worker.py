@@ -1,12 +1,15 @@
 import os
 import time
 import json
+import operator
 import threading
+from concurrent.futures import ThreadPoolExecutor
 import certifi
-import requests
+import httpx
+import orjson
+import xxhash
 import dns.resolver
-from datetime import datetime
-from flask import Flask, jsonify
+from datetime import datetime, timezone
 from pymongo import MongoClient, errors
 from dotenv import load_dotenv
 
@@ -28,62 +31,135 @@ class Config:
         if not cls.RAPID_API_HOST:
             raise ValueError("RAPID_API_HOST not set in environment")
 
-# Initialize Flask app
-app = Flask(__name__)
+# Shared HTTP/2 client so every poll multiplexes over one long-lived
+# TLS connection to RapidAPI, with HPACK compressing the repeated
+# x-rapidapi-* headers (no Connection header: HTTP/2 forbids it and
+# keeps connections alive inherently)
+RAPID_API_URL = "https://sportsbook-api2.p.rapidapi.com/v0/advantages/"
+RAPID_API_HEADERS = {
+    "x-rapidapi-key": Config.RAPID_API_KEY,
+    "x-rapidapi-host": Config.RAPID_API_HOST,
+    # httpx decompresses transparently; brotli support comes from the
+    # Brotli package in requirements
+    "accept-encoding": "br, gzip"
+}
 
-def setup_mongodb_connection():
-    """Establish connection to MongoDB Atlas with proper SSL configuration"""
-    try:
-        # Validate configuration
-        Config.validate()
-        
-        # Configure MongoDB client with proper SSL settings
-        client = MongoClient(
-            Config.MONGODB_URI,
-            tls=True,
-            tlsCAFile=certifi.where(),
-            connectTimeoutMS=30000,
-            socketTimeoutMS=None,
-            connect=True,
-            maxPoolsize=50,
-            retryWrites=True,
-            serverSelectionTimeoutMS=30000,
-            ssl_cert_reqs='CERT_REQUIRED'
-        )
-        
-        # Force a connection to verify it works
-        client.admin.command('ping')
-        print("Connected successfully to MongoDB Atlas")
-        
-        db = client.sports_betting
-        return db.bets
-    except Exception as e:
-        print(f"MongoDB Connection Error: {str(e)}")
-        raise
+# Conditional-request state: remember the last ETag so an unchanged feed
+# answers with a body-less 304, and pace polling off the API's Cache-Control
+POLL_INTERVAL_DEFAULT = 60
+POLL_INTERVAL_MIN = 30
+_ETAG = None
+_poll_interval = POLL_INTERVAL_DEFAULT
+
+_HTTP = httpx.Client(
+    timeout=httpx.Timeout(30.0, connect=5.0),
+    # limits must live on the transport: httpx ignores client-level limits
+    # when an explicit transport is supplied
+    transport=httpx.HTTPTransport(
+        http2=True,
+        retries=3,
+        limits=httpx.Limits(max_keepalive_connections=5, keepalive_expiry=600)
+    )
+)
+
+# One process-wide MongoClient; pymongo is thread-safe and manages its
+# own connection pool, so every caller draws sockets from the same warm
+# pool (the web process imports this module and shares it too)
+Config.validate()
+_CLIENT = MongoClient(
+    Config.MONGODB_URI,
+    tls=True,
+    tlsCAFile=certifi.where(),
+    connectTimeoutMS=30000,
+    socketTimeoutMS=None,
+    connect=True,
+    maxPoolSize=50,
+    minPoolSize=5,
+    waitQueueTimeoutMS=2000,
+    retryWrites=True,
+    serverSelectionTimeoutMS=30000
+)
+_COLLECTION = _CLIENT.sports_betting.bets
+
+_MONGO_LOCK = threading.Lock()
+_MONGO_READY = False
+
+def get_collection():
+    """Return the shared bets collection, verifying/indexing on first use"""
+    global _MONGO_READY
+
+    if _MONGO_READY:
+        return _COLLECTION
+
+    with _MONGO_LOCK:
+        if not _MONGO_READY:
+            try:
+                # One-time connectivity check; the pool stays warm after
+                _CLIENT.admin.command('ping')
+                print("Connected successfully to MongoDB Atlas")
+
+                # key backs the upsert filters (and rejects duplicates);
+                # updated_at backs the /status latest-update sort
+                _COLLECTION.create_index([('key', 1)], unique=True, background=True)
+                _COLLECTION.create_index([('updated_at', -1)], background=True)
+
+                _MONGO_READY = True
+            except Exception as e:
+                print(f"MongoDB Connection Error: {str(e)}")
+                raise
+
+    return _COLLECTION
+
+def _parse_poll_interval(cache_control):
+    """Derive the next poll delay from the API's Cache-Control max-age"""
+    if cache_control:
+        for directive in cache_control.split(','):
+            name, _, value = directive.strip().partition('=')
+            if name == 'max-age' and value.isdigit():
+                return max(int(value), POLL_INTERVAL_MIN)
+    return POLL_INTERVAL_DEFAULT
 
 def fetch_rapid_api_data():
-    """Fetch data from RapidAPI endpoint"""
-    url = "https://sportsbook-api2.p.rapidapi.com/v0/advantages/"
+    """Fetch data from RapidAPI endpoint; returns None when unchanged (304)"""
+    global _ETAG, _poll_interval
     querystring = {"type": "PLUS_EV_AVERAGE"}
-    headers = {
-        "x-rapidapi-key": Config.RAPID_API_KEY,
-        "x-rapidapi-host": Config.RAPID_API_HOST
-    }
+
+    headers = RAPID_API_HEADERS
+    if _ETAG:
+        headers = dict(RAPID_API_HEADERS, **{'if-none-match': _ETAG})
 
     try:
-        response = requests.get(url, headers=headers, params=querystring)
+        response = _HTTP.get(
+            RAPID_API_URL,
+            headers=headers,
+            params=querystring
+        )
+        if response.status_code == 304:
+            return None
         response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
+        _ETAG = response.headers.get('ETag')
+        _poll_interval = _parse_poll_interval(response.headers.get('Cache-Control'))
+        # orjson parses the payload in C, much faster than response.json()
+        return orjson.loads(response.content)
+    except httpx.HTTPError as e:
         print(f"RapidAPI Request Error: {str(e)}")
         raise
 
+# Hoisted so the hot loop doesn't rebuild the getter per advantage
+_NAME_GETTER = operator.itemgetter('name')
+
 def process_advantage_data(advantage):
     """Process individual advantage data"""
-    outcomes = advantage.get('outcomes', [])
-    participant = outcomes[0].get('participant') if outcomes else None
-    implied_probability = advantage.get('marketStatistics', [{}])[0].get('value')
-    outcome_payout = outcomes[0].get('payout') if outcomes else None
+    # Bind each nested dict once so it is only hashed/looked up a single time
+    market = advantage['market']
+    event = market['event']
+    outcomes = advantage.get('outcomes') or ()
+    o0 = outcomes[0] if outcomes else {}
+    participant = o0.get('participant') or {}
+    market_statistics = advantage.get('marketStatistics') or ({},)
+
+    implied_probability = market_statistics[0].get('value')
+    outcome_payout = o0.get('payout')
 
     profit_potential = None
     EV = None
@@ -97,131 +173,148 @@ def process_advantage_data(advantage):
         'key': advantage['key'],
         'edge': advantage['type'],
         'lastFoundAt': advantage['lastFoundAt'],
-        'type': advantage['market']['type'],
-        'market_name': advantage['market']['event']['name'],
-        'participants': [p['name'] for p in advantage['market']['event']['participants']],
+        'type': market['type'],
+        'market_name': event['name'],
+        'participants': list(map(_NAME_GETTER, event['participants'])),
         'outcome_payout': outcome_payout,
-        'source': outcomes[0].get('source') if outcomes else None,
-        'participant': participant['name'] if participant else None,
-        'sport': participant['sport'] if participant else None,
+        'source': o0.get('source'),
+        'participant': participant.get('name'),
+        'sport': participant.get('sport'),
         'implied_probability': implied_probability,
         'profit_potential': profit_potential,
         'EV': EV,
-        'event_start_time': advantage['market']['event'].get('startTime'),
-        'competition_instance_name': advantage['market']['event'].get('competitionInstance', {}).get('name'),
-        'updated_at': datetime.utcnow()
+        'event_start_time': event.get('startTime'),
+        'competition_instance_name': (event.get('competitionInstance') or {}).get('name')
     }
 
-def update_database(collection, bets_data):
-    """Update MongoDB with new betting data"""
+# Prefer the compiled processor when it has been built
+# (cythonize -i processor.pyx); the pure-Python version above is the fallback
+try:
+    from processor import process_advantage_data  # noqa: F811
+except ImportError:
+    pass
+
+def _content_hash(bet):
+    """Stable hash of a bet's payload, excluding the per-cycle timestamp"""
+    stable = {k: v for k, v in bet.items() if k not in ('updated_at', 'content_hash')}
+    return xxhash.xxh3_64_hexdigest(orjson.dumps(stable, option=orjson.OPT_SORT_KEYS))
+
+# Flush staging inserts in chunks of this size so Mongo starts writing
+# while later advantages are still being processed
+BULK_CHUNK_SIZE = 500
+
+def _stage_chunk(staging, batch):
+    """Insert one chunk into staging, tolerating duplicate keys in the feed"""
     try:
-        if not bets_data:
-            print("No bets data to update")
-            return
-
-        operations = []
-        for bet in bets_data:
-            operations.append(
-                {
-                    'replaceOne': {
-                        'filter': {'key': bet['key']},
-                        'replacement': bet,
-                        'upsert': True
-                    }
-                }
-            )
-        
-        result = collection.bulk_write(operations, ordered=False)
-        print(f"Successfully processed {len(operations)} bets")
-        print(f"Modified: {result.modified_count}, Upserted: {result.upserted_count}")
-    except Exception as e:
-        print(f"Database Update Error: {str(e)}")
-        raise
+        staging.insert_many(batch, ordered=False)
+    except errors.BulkWriteError as e:
+        failures = [
+            err for err in e.details.get('writeErrors', [])
+            if err.get('code') != 11000
+        ]
+        if failures:
+            raise
+
+def update_database(collection, bets_data):
+    """Update MongoDB via a staging collection and a server-side $merge
+
+    Bets stream into bets_staging in chunks (plain inserts carry no per-op
+    filter document, so the wire format is far smaller than equivalent
+    upserts), then a single $merge aggregation upserts the whole set into
+    bets on key. The content_hash comparison happens inside the merge
+    pipeline, so documents whose payload is unchanged since the last poll
+    keep their existing copy (and updated_at) entirely server-side.
+    """
+    staging = collection.database.bets_staging
+    staging.drop()
+    # Unique staging index collapses duplicate keys within one feed payload
+    # before they reach the merge
+    staging.create_index([('key', 1)], unique=True, background=True)
+
+    total = 0
+    batch = []
+    for bet in bets_data:
+        bet['content_hash'] = _content_hash(bet)
+        batch.append(bet)
+        if len(batch) >= BULK_CHUNK_SIZE:
+            _stage_chunk(staging, batch)
+            total += len(batch)
+            batch = []
+
+    if batch:
+        _stage_chunk(staging, batch)
+        total += len(batch)
+
+    if not total:
+        print("No bets data to update")
+        return
+
+    # One round-trip, set-based merge; requires the unique index on key in
+    # the target collection. _id is dropped so replacements never try to
+    # overwrite the immutable _id of an existing document.
+    staging.aggregate([
+        {'$unset': '_id'},
+        {'$set': {'updated_at': '$$NOW'}},
+        {'$merge': {
+            'into': 'bets',
+            'on': 'key',
+            'whenMatched': [{'$replaceWith': {'$cond': [
+                {'$eq': ['$content_hash', '$$new.content_hash']},
+                '$$ROOT',
+                '$$new'
+            ]}}],
+            'whenNotMatched': 'insert'
+        }}
+    ])
+    staging.drop()
+    print(f"Successfully merged {total} bets")
+
+# Single helper thread used to overlap the MongoDB connect with the
+# RapidAPI fetch each cycle, so the two I/O waits run concurrently
+_EXECUTOR = ThreadPoolExecutor(max_workers=1)
 
 def worker():
     """Background worker function"""
-    retry_count = 0
-    max_retries = 3
-    
     while True:
-        print(f"Starting job at {datetime.utcnow()}")
+        print(f"Starting job at {datetime.now(timezone.utc)}")
         try:
-            # Initialize MongoDB connection
-            collection = setup_mongodb_connection()
-            
+            # Warm the cached MongoDB connection while the API call is in flight
+            mongo_future = _EXECUTOR.submit(get_collection)
+
             # Fetch and process data
             api_data = fetch_rapid_api_data()
-            
+            collection = mongo_future.result()
+
+            if api_data is None:
+                print("Feed unchanged since last poll (HTTP 304)")
+                time.sleep(_poll_interval)
+                continue
+
             if not api_data.get('advantages'):
                 print("No advantages data available")
-                time.sleep(60)  # Wait 5 minutes
+                time.sleep(_poll_interval)
                 continue
             
-            processed_bets = [
-                process_advantage_data(advantage)
-                for advantage in api_data['advantages']
-            ]
-            
-            # Update database
+            # Stream bets straight into chunked bulk writes instead of
+            # materializing the full processed list first
+            processed_bets = map(process_advantage_data, api_data['advantages'])
             update_database(collection, processed_bets)
-            print(f"Job completed successfully at {datetime.utcnow()}")
-            retry_count = 0  # Reset retry count on success
-            
+            print(f"Job completed successfully at {datetime.now(timezone.utc)}")
+
         except (errors.ConnectionFailure, errors.ServerSelectionTimeoutError) as e:
-            retry_count += 1
-            print(f"Connection error (attempt {retry_count}/{max_retries}): {str(e)}")
-            if retry_count >= max_retries:
-                print("Max retries reached, waiting for next cycle")
-                retry_count = 0
-                time.sleep(60)
-            else:
-                time.sleep(30)  # Wait 30 seconds before retry
+            # Transient faults are already retried inside the warm
+            # connections (the httpx transport's connect retries for HTTP,
+            # retryWrites for Mongo); by the time an error reaches here it
+            # has exhausted those, so just wait out the next cycle
+            print(f"Connection error: {str(e)}")
+            time.sleep(_poll_interval)
             continue
-            
+
         except Exception as e:
             print(f"Job failed: {str(e)}")
-            time.sleep(60)  # Wait 5 minutes
-        
-        time.sleep(60)  # Regular 5-minute interval
-
-# Start background worker thread
-worker_thread = threading.Thread(target=worker, daemon=True)
-worker_thread.start()
-
-@app.route('/')
-def health_check():
-    """Health check endpoint"""
-    return jsonify({
-        'status': 'healthy',
-        'timestamp': datetime.utcnow().isoformat()
-    })
-
-@app.route('/status')
-def worker_status():
-    """Worker status endpoint"""
-    try:
-        collection = setup_mongodb_connection()
-        last_update = collection.find_one(
-            {},
-            {'updated_at': 1},
-            sort=[('updated_at', -1)]
-        )
-        
-        return jsonify({
-            'status': 'healthy',
-            'database_connected': True,
-            'last_update': last_update['updated_at'] if last_update else None,
-            'timestamp': datetime.utcnow().isoformat()
-        })
-    except Exception as e:
-        return jsonify({
-            'status': 'error',
-            'database_connected': False,
-            'error': str(e),
-            'timestamp': datetime.utcnow().isoformat()
-        }), 500
+            time.sleep(_poll_interval)
+
+        time.sleep(_poll_interval)
 
 if __name__ == '__main__':
-    # Get port from environment variable for Render compatibility
-    port = int(os.environ.get('PORT', 10000))
-    app.run(host='0.0.0.0', port=port)
\ No newline at end of file
+    worker()